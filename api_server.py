@@ -6,12 +6,12 @@ from pathlib import Path
 from datetime import datetime
 from typing import Dict, Any
 
-import fitz  # type: ignore
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from fastapi.responses import FileResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from pipeline import run_pipeline
+from utils.documents import DocumentCache
 
 OUTPUT_ROOT = Path(os.getenv("OUTPUT_ROOT", "output"))
 # Simple limits
@@ -67,24 +67,32 @@ def save_upload(upload: UploadFile, dest: Path) -> Path:
     return dest
 
 
-def get_pdf_meta(path: Path) -> Dict[str, Any]:
+def get_pdf_meta(path: Path, docs: DocumentCache = None) -> Dict[str, Any]:
+    import fitz  # type: ignore  # lazy: keeps API startup light
+
     try:
-        doc = fitz.open(path)
-        pages = len(doc)
-        doc.close()
+        if docs is not None:
+            # Reuse the job's already-parsed document
+            pages = docs.page_count(str(path))
+        else:
+            doc = fitz.open(path)
+            pages = len(doc)
+            doc.close()
     except Exception:
         pages = None
     stat = path.stat()
     return {"name": path.name, "size_bytes": stat.st_size, "pages": pages}
 
 
-def run_job(job: Job, file_a: Path, file_b: Path, text_threshold: float, image_threshold: int):
+def run_job(job: Job, file_a: Path, file_b: Path, text_threshold: float, image_threshold: int, stream: bool = False, trace: bool = False, trace_profile: bool = False):
     job.state = "running"
     job.add_progress("start", "running", "Job started")
 
     def progress_cb(step, status, message=""):
         job.add_progress(step, status, message)
 
+    # One parsed handle per input PDF, shared by the pipeline and get_pdf_meta
+    docs = DocumentCache()
     try:
         outputs = run_pipeline(
             str(file_a),
@@ -93,12 +101,16 @@ def run_job(job: Job, file_a: Path, file_b: Path, text_threshold: float, image_t
             progress_cb=progress_cb,
             text_threshold=text_threshold,
             image_threshold=image_threshold,
+            stream=stream,
+            trace=trace,
+            trace_profile=trace_profile,
+            docs=docs,
         )
         job.state = "done"
         job.result = {
             "files": {
-                "file_a": {**get_pdf_meta(file_a), "download_url": f"/files/{job.job_id}/{file_a.name}"},
-                "file_b": {**get_pdf_meta(file_b), "download_url": f"/files/{job.job_id}/{file_b.name}"},
+                "file_a": {**get_pdf_meta(file_a, docs), "download_url": f"/files/{job.job_id}/{file_a.name}"},
+                "file_b": {**get_pdf_meta(file_b, docs), "download_url": f"/files/{job.job_id}/{file_b.name}"},
             },
             "outputs": {
                 "annotated_a_pdf": f"/files/{job.job_id}/{Path(outputs['annotated_pdf_a']).name}",
@@ -111,6 +123,11 @@ def run_job(job: Job, file_a: Path, file_b: Path, text_threshold: float, image_t
                 "detailed_json": f"/files/{job.job_id}/{Path(outputs['detailed_json']).name}",
             },
         }
+        # Optional trace artifacts (open in chrome://tracing or Perfetto)
+        if "trace" in outputs:
+            job.result["outputs"]["trace_json"] = f"/files/{job.job_id}/{Path(outputs['trace']).name}"
+        if "profile" in outputs:
+            job.result["outputs"]["profile_json"] = f"/files/{job.job_id}/{Path(outputs['profile']).name}"
         job.add_progress("done", "done", "Job completed")
     except Exception as e:
         job.state = "error"
@@ -119,6 +136,8 @@ def run_job(job: Job, file_a: Path, file_b: Path, text_threshold: float, image_t
         job.error = f"{e}"
         job.add_progress("error", "error", job.error)
         job.add_progress("traceback", "error", tb)
+    finally:
+        docs.close()
 
 
 @app.post("/compare")
@@ -127,6 +146,9 @@ async def compare(
     file_b: UploadFile = File(...),
     text_threshold: float = Form(0.8),
     image_threshold: int = Form(5),
+    stream: bool = Form(False),
+    trace: bool = Form(False),
+    trace_profile: bool = Form(False),
 ):
     if not (file_a.content_type and file_a.content_type.endswith("pdf")):
         raise HTTPException(status_code=400, detail="file_a must be a PDF")
@@ -145,7 +167,7 @@ async def compare(
         JOBS[job_id] = job
 
     thread = threading.Thread(
-        target=run_job, args=(job, path_a, path_b, text_threshold, image_threshold), daemon=True
+        target=run_job, args=(job, path_a, path_b, text_threshold, image_threshold, stream, trace, trace_profile), daemon=True
     )
     thread.start()
 
@@ -21,6 +21,8 @@ export type Outputs = {
   diff_json: string
   summary_md: string
   detailed_json: string
+  trace_json?: string
+  profile_json?: string
 }
 
 export type StatusResponse = {
@@ -2,23 +2,49 @@
 """
 Thin CLI entrypoint to run the PDF comparison pipeline.
 Usage:
-    python main.py [pdf_a] [pdf_b] [output_dir]
+    python main.py [pdf_a] [pdf_b] [output_dir] [--stream] [--window N] [--trace] [--trace-profile]
 Defaults:
     pdf_a = ./data/fileA.pdf
     pdf_b = ./data/fileB.pdf
     output_dir = ./output
+Options:
+    --stream    bounded-memory mode for very large PDFs (page batches + sliding match window)
+    --window N  match window in pages for --stream (default: matcher.PAGE_WINDOW)
+    --trace     write a Chrome trace-event file (trace.json) to output_dir
+    --trace-profile
+                also write a sampled profile (profile.json); implies --trace
+    --worker-socket PATH
+                hand the job to a pre-warmed worker (see worker.py) listening on PATH;
+                defaults to $PDF_COMPARE_WORKER_SOCKET. Falls back to running
+                in-process when no worker is listening.
 """
+import argparse
 import os
 import sys
 from pathlib import Path
 
-from pipeline import run_pipeline
+from utils import matcher
+import worker
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two PDF files.")
+    parser.add_argument("pdf_a", nargs="?", default="./data/fileA.pdf")
+    parser.add_argument("pdf_b", nargs="?", default="./data/fileB.pdf")
+    parser.add_argument("output_dir", nargs="?", default="output")
+    parser.add_argument("--stream", action="store_true", help="process very large PDFs with bounded memory")
+    parser.add_argument("--window", type=int, default=matcher.PAGE_WINDOW, help="match window in pages for --stream")
+    parser.add_argument("--trace", action="store_true", help="write per-call timings to trace.json (Chrome trace format)")
+    parser.add_argument("--trace-profile", action="store_true", help="also write a sampled profile to profile.json")
+    parser.add_argument("--worker-socket", default=os.getenv("PDF_COMPARE_WORKER_SOCKET"), help="Unix socket of a running worker.py daemon")
+    return parser.parse_args(argv)
 
 
 def main():
-    pdf_path_a = sys.argv[1] if len(sys.argv) > 1 else "./data/fileA.pdf"
-    pdf_path_b = sys.argv[2] if len(sys.argv) > 2 else "./data/fileB.pdf"
-    output_dir = sys.argv[3] if len(sys.argv) > 3 else "output"
+    args = parse_args()
+    pdf_path_a = args.pdf_a
+    pdf_path_b = args.pdf_b
+    output_dir = args.output_dir
 
     if not (os.path.exists(pdf_path_a) and os.path.exists(pdf_path_b)):
         print("❌ Error: Make sure input files exist.")
@@ -26,7 +52,27 @@ def main():
         print(f"Checked path B: {os.path.abspath(pdf_path_b)}")
         sys.exit(1)
 
-    run_pipeline(pdf_path_a, pdf_path_b, output_dir)
+    options = {
+        "stream": args.stream,
+        "window": args.window,
+        "trace": args.trace,
+        "trace_profile": args.trace_profile,
+    }
+
+    if args.worker_socket:
+        try:
+            worker.submit(args.worker_socket, pdf_path_a, pdf_path_b, output_dir, **options)
+            return
+        except (FileNotFoundError, ConnectionRefusedError) as e:
+            print(f"⚠️ Worker unavailable at {args.worker_socket} ({e}); running in-process.")
+        except worker.WorkerError as e:
+            print(f"❌ Error: {e}")
+            sys.exit(1)
+
+    # Imported here so that jobs handed to a worker never pay the pipeline import cost
+    from pipeline import run_pipeline
+
+    run_pipeline(pdf_path_a, pdf_path_b, output_dir, **options)
 
 
 if __name__ == "__main__":
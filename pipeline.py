@@ -9,7 +9,12 @@ from utils import (
     differ,
     annotator,
     exporter,
+    spool,
+    tracing,
 )
+from utils.documents import DocumentCache
+
+KINDS = ("paragraphs", "images", "tables")
 
 
 def print_and_save_json(data, title, filename, output_dir, max_items=3):
@@ -25,17 +30,76 @@ def print_and_save_json(data, title, filename, output_dir, max_items=3):
     print(f"\n✅ Full data saved to: {filepath}\n")
 
 
-def run_pipeline(pdf_path_a, pdf_path_b, output_dir, progress_cb=None, text_threshold=matcher.TEXT_SIMILARITY_THRESHOLD, image_threshold=matcher.IMAGE_PHASH_THRESHOLD):
-    """Execute the PDF comparison pipeline and return output paths."""
+def print_and_save_spool(job_spool, layout, title, filename, output_dir):
+    """Streaming counterpart of print_and_save_json: JSON is assembled from spooled channels."""
+    print("-" * 20)
+    print(f"OUTPUT FOR: {title}")
+    print("-" * 20)
+
+    filepath = Path(output_dir) / filename
+    spool.write_json(job_spool, layout, filepath)
+
+    print(f"\n✅ Full data saved to: {filepath}\n")
+
+
+def _output_paths(pdf_path_a, pdf_path_b, output_dir):
+    return {
+        "output_dir": str(Path(output_dir)),
+        "annotated_pdf_b": str(Path(output_dir) / f"{Path(pdf_path_b).stem}_annotated_b.pdf"),
+        "annotated_pdf_a": str(Path(output_dir) / f"{Path(pdf_path_a).stem}_annotated_a.pdf"),
+        "extracted_a": str(Path(output_dir) / "1_extracted_content_a.json"),
+        "extracted_b": str(Path(output_dir) / "1_extracted_content_b.json"),
+        "matched": str(Path(output_dir) / "2_matched_data.json"),
+        "diffs": str(Path(output_dir) / "3_diff_results.json"),
+        "summary_md": str(Path(output_dir) / "summary_report.md"),
+        "detailed_json": str(Path(output_dir) / "detailed_report.json"),
+    }
+
+
+def run_pipeline(pdf_path_a, pdf_path_b, output_dir, progress_cb=None, text_threshold=matcher.TEXT_SIMILARITY_THRESHOLD, image_threshold=matcher.IMAGE_PHASH_THRESHOLD, stream=False, window=matcher.PAGE_WINDOW, trace=False, trace_profile=False, docs=None):
+    """Execute the PDF comparison pipeline and return output paths.
+
+    With ``stream=True`` the documents are processed in page batches and matched
+    over a sliding window of ``window`` pages (see ``run_pipeline_stream``).
+    With ``trace=True`` a Chrome trace-event file (``trace.json``) is written to
+    output_dir; ``trace_profile=True`` additionally records a sampled profile
+    (``profile.json``). Both open directly in chrome://tracing or Perfetto.
+    ``docs`` is a per-job DocumentCache so each input PDF is parsed once and
+    shared by extraction, annotation and the caller (e.g. page counts); one is
+    created for the duration of the call when not given.
+    """
+    if trace or trace_profile:
+        with tracing.job_trace(output_dir, profile=trace_profile) as artifacts:
+            outputs = run_pipeline(
+                pdf_path_a, pdf_path_b, output_dir, progress_cb=progress_cb,
+                text_threshold=text_threshold, image_threshold=image_threshold,
+                stream=stream, window=window, docs=docs,
+            )
+        return {**outputs, **artifacts}
+
+    if docs is None:
+        with DocumentCache() as docs:
+            return run_pipeline(
+                pdf_path_a, pdf_path_b, output_dir, progress_cb=progress_cb,
+                text_threshold=text_threshold, image_threshold=image_threshold,
+                stream=stream, window=window, docs=docs,
+            )
+
+    if stream:
+        return run_pipeline_stream(
+            pdf_path_a, pdf_path_b, output_dir, progress_cb=progress_cb,
+            text_threshold=text_threshold, image_threshold=image_threshold, window=window, docs=docs,
+        )
 
     def report(step, status="running", message=""):
+        tracing.step(step)
         if progress_cb:
             progress_cb(step, status, message)
 
     report("extract")
     print("======== [Step 1: Extracting Content] ========")
-    content_a = pdf_utils.extract_content(pdf_path_a, image_output_dir=output_dir)
-    content_b = pdf_utils.extract_content(pdf_path_b, image_output_dir=output_dir)
+    content_a = pdf_utils.extract_content(pdf_path_a, image_output_dir=output_dir, doc=docs.open(pdf_path_a))
+    content_b = pdf_utils.extract_content(pdf_path_b, image_output_dir=output_dir, doc=docs.open(pdf_path_b))
     print_and_save_json(content_a, "Content of PDF A", "1_extracted_content_a.json", output_dir)
     print_and_save_json(content_b, "Content of PDF B", "1_extracted_content_b.json", output_dir)
 
@@ -64,8 +128,8 @@ def run_pipeline(pdf_path_a, pdf_path_b, output_dir, progress_cb=None, text_thre
     print("\n======== [Step 5: Annotating PDF] ========")
     annotated_pdf_b_path = Path(output_dir) / f"{Path(pdf_path_b).stem}_annotated_b.pdf"
     annotated_pdf_a_path = Path(output_dir) / f"{Path(pdf_path_a).stem}_annotated_a.pdf"
-    annotator.annotate_pdf(pdf_path_b, str(annotated_pdf_b_path), diffs, matched_data, perspective="b")
-    annotator.annotate_pdf(pdf_path_a, str(annotated_pdf_a_path), diffs, matched_data, perspective="a")
+    annotator.annotate_pdf(pdf_path_b, str(annotated_pdf_b_path), diffs, matched_data, perspective="b", doc=docs.open_for_write(pdf_path_b))
+    annotator.annotate_pdf(pdf_path_a, str(annotated_pdf_a_path), diffs, matched_data, perspective="a", doc=docs.open_for_write(pdf_path_a))
 
     report("export")
     print("\n======== [Step 6: Exporting Reports] ========")
@@ -94,14 +158,147 @@ def run_pipeline(pdf_path_a, pdf_path_b, output_dir, progress_cb=None, text_thre
     print("\n🎉 Comparison process completed successfully!")
     print(f"Find all reports in the '{output_dir}' directory.")
 
-    return {
-        "output_dir": str(Path(output_dir)),
-        "annotated_pdf_b": str(annotated_pdf_b_path),
-        "annotated_pdf_a": str(annotated_pdf_a_path),
-        "extracted_a": str(Path(output_dir) / "1_extracted_content_a.json"),
-        "extracted_b": str(Path(output_dir) / "1_extracted_content_b.json"),
-        "matched": str(Path(output_dir) / "2_matched_data.json"),
-        "diffs": str(Path(output_dir) / "3_diff_results.json"),
-        "summary_md": str(Path(output_dir) / "summary_report.md"),
-        "detailed_json": str(Path(output_dir) / "detailed_report.json"),
-    }
+    return _output_paths(pdf_path_a, pdf_path_b, output_dir)
+
+
+def run_pipeline_stream(pdf_path_a, pdf_path_b, output_dir, progress_cb=None, text_threshold=matcher.TEXT_SIMILARITY_THRESHOLD, image_threshold=matcher.IMAGE_PHASH_THRESHOLD, window=matcher.PAGE_WINDOW, batch_pages=pdf_utils.STREAM_BATCH_PAGES, docs=None):
+    """Bounded-memory variant of run_pipeline for very large PDFs.
+
+    Both documents are extracted in batches of ``batch_pages`` pages. Elements
+    of A are only compared against elements of B whose page is within
+    ``window`` pages; B elements that fall behind the window are final
+    additions. Extracted elements, matches and diffs are spooled to disk as
+    they are produced and the JSON reports and annotations are written from
+    the spool, so peak memory depends on the window, not on document length.
+    Outputs are identical to the batch mode as long as every match lies
+    within the window.
+    """
+    if docs is None:
+        with DocumentCache() as docs:
+            return run_pipeline_stream(
+                pdf_path_a, pdf_path_b, output_dir, progress_cb=progress_cb,
+                text_threshold=text_threshold, image_threshold=image_threshold,
+                window=window, batch_pages=batch_pages, docs=docs,
+            )
+
+    def report(step, status="running", message=""):
+        tracing.step(step)
+        if progress_cb:
+            progress_cb(step, status, message)
+
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    paths = _output_paths(pdf_path_a, pdf_path_b, output_dir)
+    job_spool = spool.Spool(output_dir)
+    try:
+        matchers = {
+            "paragraphs": matcher.WindowMatcher(matcher._text_match_score, window, threshold=text_threshold),
+            "images": matcher.WindowMatcher(matcher._image_match_score, window, threshold=image_threshold),
+            "tables": matcher.WindowMatcher(matcher._table_match_score, window, threshold=text_threshold),
+        }
+        diff_funcs = {
+            "paragraphs": differ.diff_paragraphs,
+            "images": differ.diff_images,
+            "tables": differ.diff_tables,
+        }
+
+        def expire(next_page_a=None):
+            for kind in KINDS:
+                job_spool.extend(f"{kind}.new", matchers[kind].evict(next_page_a))
+
+        report("extract")
+        print("======== [Step 1-3: Streaming Extract / Match / Diff] ========")
+        batches_b = pdf_utils.iter_content(pdf_path_b, image_output_dir=output_dir, batch_pages=batch_pages, doc=docs.open(pdf_path_b))
+        last_page_b = -1
+        for (_, last_page_a), content_a in pdf_utils.iter_content(pdf_path_a, image_output_dir=output_dir, batch_pages=batch_pages, doc=docs.open(pdf_path_a)):
+            # Load B until the window of the last A page in this batch is covered
+            while last_page_b is not None and last_page_b < last_page_a + window:
+                batch_b = next(batches_b, None)
+                if batch_b is None:
+                    last_page_b = None
+                    break
+                (_, last_page_b), content_b = batch_b
+                for kind in KINDS:
+                    job_spool.extend(f"b.{kind}", content_b[kind])
+                    matchers[kind].add_b(content_b[kind])
+
+            report("match", message=f"A pages up to {last_page_a + 1}")
+            for kind in KINDS:
+                job_spool.extend(f"a.{kind}", content_a[kind])
+                pairs, deleted = matchers[kind].match(content_a[kind])
+                job_spool.extend(f"{kind}.matched", pairs)
+                job_spool.extend(f"{kind}.deleted", deleted)
+                job_spool.extend(f"{kind}.modified", diff_funcs[kind](pairs))
+            expire(last_page_a + 1)
+
+        # A is exhausted: whatever remains of B can no longer be matched
+        expire()
+        for _, content_b in batches_b:
+            for kind in KINDS:
+                job_spool.extend(f"b.{kind}", content_b[kind])
+                job_spool.extend(f"{kind}.new", content_b[kind])
+
+        print_and_save_spool(job_spool, {kind: f"a.{kind}" for kind in KINDS}, "Content of PDF A", "1_extracted_content_a.json", output_dir)
+        print_and_save_spool(job_spool, {kind: f"b.{kind}" for kind in KINDS}, "Content of PDF B", "1_extracted_content_b.json", output_dir)
+        matched_layout = {
+            kind: {
+                "matched_pairs": f"{kind}.matched",
+                "new_in_b": f"{kind}.new",
+                "deleted_from_a": f"{kind}.deleted",
+            }
+            for kind in KINDS
+        }
+        print_and_save_spool(job_spool, matched_layout, "Matching Results", "2_matched_data.json", output_dir)
+        report("diff")
+        print_and_save_spool(job_spool, {kind: f"{kind}.modified" for kind in KINDS}, "Difference Analysis Results", "3_diff_results.json", output_dir)
+
+        structured_summary = "# PDF Comparison Report\n\n_Summary generation disabled._"
+        llm_summary = "LLM summary disabled."
+
+        report("annotate")
+        print("\n======== [Step 5: Annotating PDF] ========")
+
+        def spooled(suffix, kind_label):
+            channels = [f"{kind}.{suffix}" for kind in KINDS]
+            items = (
+                {**item, "_kind": kind_label}
+                for channel in channels
+                for item in job_spool.iter(channel)
+            )
+            return items, sum(job_spool.count(channel) for channel in channels)
+
+        for path, perspective, new_suffix, new_label in (
+            (pdf_path_b, "b", "new", "added"),
+            (pdf_path_a, "a", "deleted", "deleted"),
+        ):
+            new_items, n_new = spooled(new_suffix, new_label)
+            modified_items, n_modified = spooled("modified", "modified")
+            annotator.annotate_items(
+                path, paths[f"annotated_pdf_{perspective}"], new_items, modified_items,
+                perspective=perspective, counts=(n_new, n_modified), doc=docs.open_for_write(path),
+            )
+
+        report("export")
+        print("\n======== [Step 6: Exporting Reports] ========")
+        detailed_layout = {}
+        for kind in KINDS:
+            detailed_layout[f"new_{kind}"] = f"{kind}.new"
+            detailed_layout[f"deleted_{kind}"] = f"{kind}.deleted"
+            detailed_layout[f"modified_{kind}"] = f"{kind}.modified"
+
+        exporter.export_report_stream(
+            output_dir,
+            annotated_pdf_b_path=paths["annotated_pdf_b"],
+            annotated_pdf_a_path=paths["annotated_pdf_a"],
+            structured_summary=structured_summary,
+            llm_summary=llm_summary,
+            spool=job_spool,
+            detailed_layout=detailed_layout,
+        )
+    finally:
+        job_spool.close()
+
+    report("done", status="done")
+    print("\n🎉 Comparison process completed successfully!")
+    print(f"Find all reports in the '{output_dir}' directory.")
+
+    return paths
@@ -1,5 +1,7 @@
 # utils/annotator.py
-import fitz
+import itertools
+
+from utils import tracing
 
 # Semi-transparent palettes
 COLOR_ADDED = (0.2, 0.8, 0.4)   # soft green
@@ -11,15 +13,13 @@ def _wrap_items_with_kind(items, kind):
     for it in items:
         yield {**it, "_kind": kind}
 
-def annotate_pdf(pdf_path: str, output_path: str, diffs: dict, matched_data: dict, perspective: str = "b"):
+def annotate_pdf(pdf_path: str, output_path: str, diffs: dict, matched_data: dict, perspective: str = "b", doc=None):
     """
     在指定 PDF 上標註差異。
     perspective:
         - "b": 新增/修改（B 視角：新增=綠、修改=藍）
         - "a": 刪除/修改（A 視角：刪除=紅、修改=藍）
     """
-    doc = fitz.open(pdf_path)
-    
     if perspective == "b":
         new_items = list(_wrap_items_with_kind(matched_data['paragraphs'][1] + matched_data['images'][1] + matched_data['tables'][1], "added"))
     else:
@@ -27,9 +27,23 @@ def annotate_pdf(pdf_path: str, output_path: str, diffs: dict, matched_data: dic
         new_items = list(_wrap_items_with_kind(matched_data['paragraphs'][2] + matched_data['images'][2] + matched_data['tables'][2], "deleted"))
     modified_items = list(_wrap_items_with_kind(diffs['paragraphs'] + diffs['images'] + diffs['tables'], "modified"))
 
-    print(f"\nAnnotating PDF ({perspective} view)... Found {len(new_items)} new items and {len(modified_items)} modified items.")
+    return annotate_items(pdf_path, output_path, new_items, modified_items, perspective=perspective, doc=doc)
+
+def annotate_items(pdf_path: str, output_path: str, new_items, modified_items, perspective: str = "b", counts=None, doc=None):
+    """
+    依序標註已加上 _kind 的項目；new_items/modified_items 可為任意可迭代物件（串流模式由暫存檔逐筆讀回）。
+    counts 為 (新增/刪除數, 修改數)，未提供時以 len() 計算。
+    doc 為可寫入的共用文件（DocumentCache.open_for_write）；未提供時自行開啟。
+    """
+    import fitz  # 延遲載入，縮短 CLI 啟動時間
+
+    if doc is None:
+        doc = fitz.open(pdf_path)
+
+    n_new, n_modified = counts if counts is not None else (len(new_items), len(modified_items))
+    print(f"\nAnnotating PDF ({perspective} view)... Found {n_new} new items and {n_modified} modified items.")
 
-    for item in new_items + modified_items:
+    for item in itertools.chain(new_items, modified_items):
         try:
             page = doc.load_page(item['page'])
             bbox = fitz.Rect(item['bbox'])
@@ -55,6 +69,7 @@ def annotate_pdf(pdf_path: str, output_path: str, diffs: dict, matched_data: dic
         except Exception as e:
             print(f"Warning: Could not annotate item (uid: {item.get('uid_b', 'N/A')}) on page {item.get('page', 'N/A')}. Error: {e}")
 
-    doc.save(output_path, garbage=4, deflate=True, clean=True)
+    with tracing.span("annotator_save", perspective=perspective):
+        doc.save(output_path, garbage=4, deflate=True, clean=True)
     print(f"✅ Annotated PDF saved to: {output_path}")
     return output_path
@@ -1,6 +1,4 @@
 # utils/differ.py
-import pandas as pd
-
 def diff_all(matched_data: dict):
     """對所有已配對的項目進行差異分析"""
     print("\nAnalyzing differences in paragraphs...")
@@ -53,6 +51,8 @@ def diff_images(matched_images: list) -> list:
 
 def diff_tables(matched_tables: list) -> list:
     """分析表格差異 (使用 pandas)"""
+    import pandas as pd  # 只有表格差異分析需要 pandas，延遲載入以縮短啟動時間
+
     diffs = []
     for pair in matched_tables:
         if pair['confidence'] < 1.0:
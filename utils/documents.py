@@ -0,0 +1,81 @@
+# utils/documents.py
+import mmap
+import os
+
+
+class DocumentCache:
+    """
+    每個 job 一份的 PDF 文件快取：每個輸入檔只 memory-map 並解析一次
+    (fitz.open(stream=...))，提取、頁數統計與標註共用同一個 Document。
+
+    open() 取得唯讀用途的共用文件；open_for_write() 第一次會交出共用文件本身
+    (標註是最後一個階段，不需複製)，之後再次要求寫入同一檔案時，才從同一份
+    映射重新開啟一份獨立副本，避免標註互相疊加。
+    """
+
+    def __init__(self):
+        self._entries = {}  # realpath -> {"file", "mmap", "view", "doc", "written"}
+        self._copies = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _entry(self, pdf_path: str) -> dict:
+        import fitz  # PyMuPDF，延遲載入
+
+        key = os.path.realpath(pdf_path)
+        entry = self._entries.get(key)
+        if entry is None:
+            f = open(key, "rb")
+            try:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # 空檔案無法 mmap
+                f.close()
+                raise fitz.EmptyFileError(f"Cannot open empty file: {key}")
+            view = memoryview(mapped)
+            try:
+                doc = fitz.open(stream=view, filetype="pdf")
+            except Exception:
+                view.release()
+                mapped.close()
+                f.close()
+                raise
+            entry = self._entries[key] = {"file": f, "mmap": mapped, "view": view, "doc": doc, "written": False}
+        return entry
+
+    def open(self, pdf_path: str):
+        """取得共用的唯讀文件（呼叫端不可 close）。"""
+        return self._entry(pdf_path)["doc"]
+
+    def open_for_write(self, pdf_path: str):
+        """取得可寫入（標註）的文件；同一檔案第二次要求寫入時回傳獨立副本。"""
+        import fitz  # PyMuPDF，延遲載入
+
+        entry = self._entry(pdf_path)
+        if not entry["written"]:
+            entry["written"] = True
+            return entry["doc"]
+        copy = fitz.open(stream=entry["view"], filetype="pdf")
+        self._copies.append(copy)
+        return copy
+
+    def page_count(self, pdf_path: str) -> int:
+        return len(self.open(pdf_path))
+
+    def close(self):
+        for doc in self._copies:
+            doc.close()
+            doc.stream = None
+        self._copies.clear()
+        for entry in self._entries.values():
+            entry["doc"].close()
+            # 必須先釋放 memoryview，mmap 才能關閉
+            entry["doc"].stream = None
+            entry["view"].release()
+            entry["mmap"].close()
+            entry["file"].close()
+        self._entries.clear()
@@ -3,6 +3,16 @@ import json
 import shutil
 from pathlib import Path
 
+from utils.spool import write_json
+
+def _write_summary_md(output_path: Path, structured_summary: str, llm_summary: str) -> Path:
+    md_report_path = output_path / "summary_report.md"
+    report_content = f"{structured_summary}\n\n## III. AI-Generated Summary\n\n{llm_summary}"
+    with open(md_report_path, 'w', encoding='utf-8') as f:
+        f.write(report_content)
+    print(f"✅ Markdown summary saved to: {md_report_path}")
+    return md_report_path
+
 def export_report(output_dir: str, annotated_pdf_b_path: str, annotated_pdf_a_path: str, structured_summary: str, llm_summary: str, detailed_diffs: dict):
     """匯出所有報告檔案"""
     output_path = Path(output_dir)
@@ -20,11 +30,7 @@ def export_report(output_dir: str, annotated_pdf_b_path: str, annotated_pdf_a_pa
     print(f"✅ Detailed JSON report saved to: {json_path}")
 
     # 2. 寫入 Markdown 報告
-    md_report_path = output_path / "summary_report.md"
-    report_content = f"{structured_summary}\n\n## III. AI-Generated Summary\n\n{llm_summary}"
-    with open(md_report_path, 'w', encoding='utf-8') as f:
-        f.write(report_content)
-    print(f"✅ Markdown summary saved to: {md_report_path}")
+    md_report_path = _write_summary_md(output_path, structured_summary, llm_summary)
 
     # 記錄標註檔路徑（方便上層使用）
     return {
@@ -33,3 +39,23 @@ def export_report(output_dir: str, annotated_pdf_b_path: str, annotated_pdf_a_pa
         "summary_md": str(md_report_path),
         "detailed_json": str(json_path)
     }
+
+def export_report_stream(output_dir: str, annotated_pdf_b_path: str, annotated_pdf_a_path: str, structured_summary: str, llm_summary: str, spool, detailed_layout: dict):
+    """串流模式：詳細 JSON 報告由 spool 逐筆寫出，輸出內容與 export_report 相同"""
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    # 1. 寫入詳細的 JSON 報告（spool 內的 pandas_diff 已是字串）
+    json_path = output_path / "detailed_report.json"
+    write_json(spool, detailed_layout, json_path)
+    print(f"✅ Detailed JSON report saved to: {json_path}")
+
+    # 2. 寫入 Markdown 報告
+    md_report_path = _write_summary_md(output_path, structured_summary, llm_summary)
+
+    return {
+        "annotated_pdf_b": str(annotated_pdf_b_path),
+        "annotated_pdf_a": str(annotated_pdf_a_path),
+        "summary_md": str(md_report_path),
+        "detailed_json": str(json_path)
+    }
@@ -1,11 +1,13 @@
 # utils/matcher.py
 import difflib
-import imagehash
 import re # 導入正則表達式模組
 
+from utils import tracing
+
 # --- Constants ---
 TEXT_SIMILARITY_THRESHOLD = 0.8  # 文本相似度閾值
 IMAGE_PHASH_THRESHOLD = 5        # 感知雜湊漢明距離閾值
+PAGE_WINDOW = 3                  # 串流模式的配對頁面視窗 (前後頁數)
 
 # ===== 文字正規化函數 =====
 def normalize_text(text: str) -> str:
@@ -21,35 +23,49 @@ def normalize_text(text: str) -> str:
     return normalized
 # =================================
 
+def _best_match(item_a: dict, b_items_pool: list, match_func, window=None, **kwargs):
+    """在候選池中找出與 item_a 分數最高的項目，回傳 (池中索引, 分數)。"""
+    best_index = None
+    highest_score = -1
+
+    # 為了提升效率，預先正規化 item_a 的文字
+    normalized_text_a = None
+    if 'text' in item_a:
+        normalized_text_a = normalize_text(item_a['text'])
+
+    for i, item_b in enumerate(b_items_pool):
+        # 串流模式只比較頁碼落在視窗內的候選
+        if window is not None and abs(item_b['page'] - item_a['page']) > window:
+            continue
+        # 傳遞預先處理好的 item_a 文字，避免重複計算
+        score = match_func(item_a, item_b, normalized_a=normalized_text_a, **kwargs)
+        if score > highest_score:
+            highest_score = score
+            best_index = i
+
+    return best_index, highest_score
+
+
 def match_elements(items_a: list, items_b: list, match_func, **kwargs):
     """通用配對函數"""
+    with tracing.span("match_elements", func=match_func.__name__, n_a=len(items_a), n_b=len(items_b)):
+        return _match_elements(items_a, items_b, match_func, **kwargs)
+
+def _match_elements(items_a: list, items_b: list, match_func, **kwargs):
     b_items_pool = list(items_b)
     matched_pairs = []
     unmatched_a = []
 
     for item_a in items_a:
-        best_match = None
-        highest_score = -1
-        
-        # 為了提升效率，預先正規化 item_a 的文字
-        normalized_text_a = None
-        if 'text' in item_a:
-            normalized_text_a = normalize_text(item_a['text'])
-
-        for i, item_b in enumerate(b_items_pool):
-            # 傳遞預先處理好的 item_a 文字，避免重複計算
-            score = match_func(item_a, item_b, normalized_a=normalized_text_a, **kwargs)
-            if score > highest_score:
-                highest_score = score
-                best_match = (i, item_b)
+        best_index, highest_score = _best_match(item_a, b_items_pool, match_func, **kwargs)
 
         if highest_score >= kwargs.get('threshold', 0.8):
             matched_pairs.append({
                 "item_a": item_a,
-                "item_b": best_match[1],
+                "item_b": b_items_pool[best_index],
                 "confidence": highest_score
             })
-            b_items_pool.pop(best_match[0])
+            b_items_pool.pop(best_index)
         else:
             unmatched_a.append(item_a)
             
@@ -57,6 +73,60 @@ def match_elements(items_a: list, items_b: list, match_func, **kwargs):
     
     return matched_pairs, unmatched_b, unmatched_a
 
+
+class WindowMatcher:
+    """
+    串流模式用的滑動頁面視窗配對器。
+    B 的項目以批次加入候選池，A 的項目依頁碼順序配對，只與頁碼差距在 window 內的候選比較；
+    超出視窗的 B 項目會被移出候選池，成為最終的「B 新增」項目。
+    當所有配對都落在視窗內時，結果與 match_elements 完全一致。
+    """
+
+    def __init__(self, match_func, window: int, **kwargs):
+        self.match_func = match_func
+        self.window = window
+        self.kwargs = kwargs
+        self.b_items_pool = []
+
+    def add_b(self, items_b: list):
+        self.b_items_pool.extend(items_b)
+
+    def match(self, items_a: list):
+        """配對一批 A 項目，回傳 (matched_pairs, unmatched_a)。"""
+        with tracing.span("match_batch", func=self.match_func.__name__, n_a=len(items_a), n_b=len(self.b_items_pool)):
+            return self._match(items_a)
+
+    def _match(self, items_a: list):
+        matched_pairs = []
+        unmatched_a = []
+        for item_a in items_a:
+            best_index, highest_score = _best_match(
+                item_a, self.b_items_pool, self.match_func, window=self.window, **self.kwargs
+            )
+            if highest_score >= self.kwargs.get('threshold', 0.8):
+                matched_pairs.append({
+                    "item_a": item_a,
+                    "item_b": self.b_items_pool.pop(best_index),
+                    "confidence": highest_score
+                })
+            else:
+                unmatched_a.append(item_a)
+        return matched_pairs, unmatched_a
+
+    def evict(self, next_page_a: int = None) -> list:
+        """
+        移出之後的 A 頁面 (>= next_page_a) 都不可能再配對到的 B 項目，依原順序回傳。
+        next_page_a 為 None 時代表 A 已結束，清空整個候選池。
+        """
+        if next_page_a is None:
+            expired, self.b_items_pool = self.b_items_pool, []
+            return expired
+        expired = [it for it in self.b_items_pool if it['page'] < next_page_a - self.window]
+        if expired:
+            self.b_items_pool = [it for it in self.b_items_pool if it['page'] >= next_page_a - self.window]
+        return expired
+
+
 # --- Matcher Functions ---
 # ===== 文字比對評分函數 =====
 def _text_match_score(para_a, para_b, **kwargs):
@@ -78,6 +148,7 @@ def _text_match_score(para_a, para_b, **kwargs):
 
 def _image_match_score(img_a, img_b, **kwargs):
     """計算兩張圖片的相似度分數 (基於 pHash)"""
+    import imagehash  # 延遲載入，縮短 CLI 啟動時間
     hash_a = imagehash.hex_to_hash(img_a['phash'])
     hash_b = imagehash.hex_to_hash(img_b['phash'])
     distance = hash_a - hash_b
@@ -1,99 +1,151 @@
 # utils/pdf_utils.py
-import fitz  # PyMuPDF
 import hashlib
 import json
 from pathlib import Path
-from typing import List, Tuple, Dict, Any
-import imagehash
-from PIL import Image
+from typing import List, Tuple, Dict, Any, Iterator
 import io
 
-def extract_content(pdf_path: str, image_output_dir: str) -> Dict[str, List[Dict]]:
+from utils import tracing
+
+# 串流模式下每批提取的頁數
+STREAM_BATCH_PAGES = 8
+
+
+def _empty_content() -> Dict[str, List[Dict]]:
+    return {"paragraphs": [], "images": [], "tables": []}
+
+
+def _extract_page(doc, page_num: int, page, image_folder: Path, para_index: int) -> Tuple[Dict[str, List[Dict]], int]:
     """
-    從 PDF 提取文字、圖片、表格，並為每個元素生成 UID 和必要特徵。
+    提取單一頁面的表格、圖片與文字段落。
+    para_index 為跨頁連續的段落編號，回傳更新後的值。
     """
-    doc = fitz.open(pdf_path)
-    pdf_name = Path(pdf_path).stem
-    
-    # 準備圖片儲存目錄
-    image_folder = Path(image_output_dir) / pdf_name
-    image_folder.mkdir(parents=True, exist_ok=True)
+    # 重量級依賴延遲到實際提取時才載入，縮短 CLI 啟動時間
+    import fitz  # PyMuPDF
+    import imagehash
+    from PIL import Image
+
+    content = _empty_content()
 
-    all_tables = []
-    all_images = []
-    
     # 1. 優先提取表格和圖片資訊
-    for page_num, page in enumerate(doc):
-        # 提取表格
+    # 提取表格
+    with tracing.span("find_tables", page=page_num):
         tables_on_page = page.find_tables()
-        for tbl_idx, table in enumerate(tables_on_page):
-            all_tables.append({
-                "uid": f"p{page_num}_tbl{tbl_idx}",
-                "page": page_num,
-                "bbox": list(table.bbox),
-                "content": table.extract(),  # 儲存結構化資料
-                "content_str": "\n".join([",".join(map(str, row)) for row in table.extract()])
-            })
+    for tbl_idx, table in enumerate(tables_on_page):
+        content["tables"].append({
+            "uid": f"p{page_num}_tbl{tbl_idx}",
+            "page": page_num,
+            "bbox": list(table.bbox),
+            "content": table.extract(),  # 儲存結構化資料
+            "content_str": "\n".join([",".join(map(str, row)) for row in table.extract()])
+        })
 
-        # 提取圖片
+    # 提取圖片
+    with tracing.span("get_images", page=page_num):
         images_on_page = page.get_images(full=True)
-        for img_idx, img in enumerate(images_on_page):
-            xref = img[0]
-            try:
+    for img_idx, img in enumerate(images_on_page):
+        xref = img[0]
+        try:
+            with tracing.span("extract_image", page=page_num, xref=xref):
                 base_image = doc.extract_image(xref)
                 image_bytes = base_image["image"]
-                
+
                 # 計算 phash
                 pil_image = Image.open(io.BytesIO(image_bytes))
                 phash = imagehash.phash(pil_image)
 
-                img_path = image_folder / f"p{page_num}_img{img_idx}.{base_image['ext']}"
-                with open(img_path, "wb") as f:
-                    f.write(image_bytes)
+            img_path = image_folder / f"p{page_num}_img{img_idx}.{base_image['ext']}"
+            with open(img_path, "wb") as f:
+                f.write(image_bytes)
 
-                all_images.append({
-                    "uid": f"p{page_num}_img{img_idx}",
-                    "page": page_num,
-                    "bbox": list(page.get_image_bbox(img).irect),
-                    "path": str(img_path),
-                    "phash": str(phash)
-                })
-            except Exception as e:
-                print(f"Warning: Could not process image {img_idx} on page {page_num}: {e}")
+            content["images"].append({
+                "uid": f"p{page_num}_img{img_idx}",
+                "page": page_num,
+                "bbox": list(page.get_image_bbox(img).irect),
+                "path": str(img_path),
+                "phash": str(phash)
+            })
+        except Exception as e:
+            print(f"Warning: Could not process image {img_idx} on page {page_num}: {e}")
 
     # 2. 提取文字段落，並過濾掉表格內的文字
-    all_paragraphs = []
-    para_index = 0
-    for page_num, page in enumerate(doc):
-        table_bboxes_on_page = [t['bbox'] for t in all_tables if t['page'] == page_num]
-        
+    table_bboxes_on_page = [t['bbox'] for t in content["tables"]]
+
+    with tracing.span("get_text", page=page_num):
         blocks = page.get_text("blocks")
-        for block in blocks:
-            # block format: (x0, y0, x1, y1, text, block_no, block_type)
-            block_bbox = fitz.Rect(block[0], block[1], block[2], block[3])
-            text = block[4].strip()
-            
-            if not text:
-                continue
-
-            is_in_table = any(block_bbox.intersects(fitz.Rect(bbox)) for bbox in table_bboxes_on_page)
-            
-            if not is_in_table:
-                # 簡單地將每個文字區塊視為一個段落，可以根據需求合併
-                all_paragraphs.append({
-                    "uid": f"p{page_num}_para{para_index}",
-                    "page": page_num,
-                    "bbox": list(block_bbox),
-                    "text": text
-                })
-                para_index += 1
-                
-    doc.close()
-
-    print(f"✅ Extracted from {pdf_name}: {len(all_paragraphs)} paragraphs, {len(all_images)} images, {len(all_tables)} tables.")
-    
-    return {
-        "paragraphs": all_paragraphs,
-        "images": all_images,
-        "tables": all_tables
-    }
\ No newline at end of file
+    for block in blocks:
+        # block format: (x0, y0, x1, y1, text, block_no, block_type)
+        block_bbox = fitz.Rect(block[0], block[1], block[2], block[3])
+        text = block[4].strip()
+
+        if not text:
+            continue
+
+        is_in_table = any(block_bbox.intersects(fitz.Rect(bbox)) for bbox in table_bboxes_on_page)
+
+        if not is_in_table:
+            # 簡單地將每個文字區塊視為一個段落，可以根據需求合併
+            content["paragraphs"].append({
+                "uid": f"p{page_num}_para{para_index}",
+                "page": page_num,
+                "bbox": list(block_bbox),
+                "text": text
+            })
+            para_index += 1
+
+    return content, para_index
+
+
+def iter_content(pdf_path: str, image_output_dir: str, batch_pages: int = STREAM_BATCH_PAGES, doc=None) -> Iterator[Tuple[Tuple[int, int], Dict[str, List[Dict]]]]:
+    """
+    逐批提取 PDF 內容，每批最多 batch_pages 頁。
+    產生 ((起始頁, 結束頁), 內容)，內容格式與 extract_content 相同，
+    UID 與段落編號跨批連續，因此所有批次串接後與一次性提取的結果一致。
+    doc 為已開啟的共用文件（見 utils.documents）；未提供時自行開啟並在結束時關閉。
+    """
+    import fitz  # PyMuPDF
+
+    owns_doc = doc is None
+    if owns_doc:
+        doc = fitz.open(pdf_path)
+    pdf_name = Path(pdf_path).stem
+
+    # 準備圖片儲存目錄
+    image_folder = Path(image_output_dir) / pdf_name
+    image_folder.mkdir(parents=True, exist_ok=True)
+
+    totals = {"paragraphs": 0, "images": 0, "tables": 0}
+    para_index = 0
+    try:
+        batch = _empty_content()
+        first_page = 0
+        for page_num, page in enumerate(doc):
+            with tracing.span("extract_page", pdf=pdf_name, page=page_num):
+                page_content, para_index = _extract_page(doc, page_num, page, image_folder, para_index)
+            for key, items in page_content.items():
+                batch[key].extend(items)
+                totals[key] += len(items)
+
+            if page_num - first_page + 1 >= batch_pages:
+                yield (first_page, page_num), batch
+                batch = _empty_content()
+                first_page = page_num + 1
+
+        if first_page < len(doc):
+            yield (first_page, len(doc) - 1), batch
+    finally:
+        if owns_doc:
+            doc.close()
+
+    print(f"✅ Extracted from {pdf_name}: {totals['paragraphs']} paragraphs, {totals['images']} images, {totals['tables']} tables.")
+
+
+def extract_content(pdf_path: str, image_output_dir: str, doc=None) -> Dict[str, List[Dict]]:
+    """
+    從 PDF 提取文字、圖片、表格，並為每個元素生成 UID 和必要特徵。
+    """
+    content = _empty_content()
+    for _, batch in iter_content(pdf_path, image_output_dir, doc=doc):
+        for key, items in batch.items():
+            content[key].extend(items)
+    return content
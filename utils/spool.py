@@ -0,0 +1,87 @@
+# utils/spool.py
+import json
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterator, Union
+
+INDENT = "  "
+
+
+class Spool:
+    """
+    串流模式的暫存區：每個 channel 對應一個 JSON Lines 暫存檔，
+    元素寫入後即可從記憶體釋放，需要時再依寫入順序讀回。
+    """
+
+    def __init__(self, root_dir: str):
+        self.dir = Path(tempfile.mkdtemp(prefix=".spool_", dir=root_dir))
+        self._handles = {}
+        self._counts: Dict[str, int] = {}
+
+    def _path(self, channel: str) -> Path:
+        return self.dir / f"{channel}.jsonl"
+
+    def extend(self, channel: str, items: list):
+        f = self._handles.get(channel)
+        if f is None:
+            f = self._handles[channel] = open(self._path(channel), "w", encoding="utf-8")
+            self._counts.setdefault(channel, 0)
+        for item in items:
+            f.write(json.dumps(item, ensure_ascii=False))
+            f.write("\n")
+        self._counts[channel] += len(items)
+
+    def count(self, channel: str) -> int:
+        return self._counts.get(channel, 0)
+
+    def iter(self, channel: str) -> Iterator[dict]:
+        """依寫入順序逐筆讀回 channel 內的元素。"""
+        f = self._handles.get(channel)
+        if f is None:
+            return
+        f.flush()
+        with open(self._path(channel), "r", encoding="utf-8") as reader:
+            for line in reader:
+                yield json.loads(line)
+
+    def close(self):
+        for f in self._handles.values():
+            f.close()
+        self._handles.clear()
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+Layout = Union[str, Dict[str, "Layout"]]
+
+
+def write_json(spool: Spool, layout: Layout, filepath: str):
+    """
+    依 layout 將 spool 內容寫成 JSON 檔，一次只讀入一個元素。
+    layout 為巢狀 dict，葉節點是 channel 名稱（對應一個 list）；
+    輸出與 json.dump(..., indent=2, ensure_ascii=False) 逐字元相同。
+    """
+    with open(filepath, "w", encoding="utf-8") as f:
+        _write_node(f, spool, layout, 0)
+
+
+def _write_node(f, spool: Spool, node: Layout, level: int):
+    pad = INDENT * (level + 1)
+    if isinstance(node, dict):
+        if not node:
+            f.write("{}")
+            return
+        f.write("{")
+        for i, (key, child) in enumerate(node.items()):
+            f.write(("," if i else "") + "\n" + pad + json.dumps(key, ensure_ascii=False) + ": ")
+            _write_node(f, spool, child, level + 1)
+        f.write("\n" + INDENT * level + "}")
+        return
+
+    empty = True
+    for item in spool.iter(node):
+        f.write(("[" if empty else ",") + "\n" + pad)
+        # 巢狀元素需要補上外層縮排
+        f.write(json.dumps(item, indent=2, ensure_ascii=False).replace("\n", "\n" + pad))
+        empty = False
+    f.write("[]" if empty else "\n" + INDENT * level + "]")
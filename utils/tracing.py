@@ -0,0 +1,173 @@
+# utils/tracing.py
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+TRACE_FILENAME = "trace.json"
+PROFILE_FILENAME = "profile.json"
+PROFILE_INTERVAL = 0.005  # 取樣間隔 (秒)
+
+_current_tracer = contextvars.ContextVar("current_tracer", default=None)
+
+
+class Tracer:
+    """
+    以 Chrome trace-event 格式記錄 span，可直接用 chrome://tracing 或 Perfetto 開啟。
+    時間戳單位為微秒，以建立 Tracer 的時間為零點。
+    """
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.pid = os.getpid()
+        self.events = []
+        self._step = None
+
+    def now(self) -> float:
+        return (time.perf_counter() - self.t0) * 1e6
+
+    @contextmanager
+    def span(self, name: str, cat: str = "pipeline", **args):
+        start = self.now()
+        try:
+            yield
+        finally:
+            self.events.append({
+                "name": name,
+                "cat": cat,
+                "ph": "X",
+                "ts": start,
+                "dur": self.now() - start,
+                "pid": self.pid,
+                "tid": threading.get_ident(),
+                "args": args,
+            })
+
+    def step(self, name: str):
+        """結束上一個 pipeline 步驟並開始新的步驟（"done" 只結束不開始）。"""
+        ts = self.now()
+        tid = threading.get_ident()
+        if self._step is not None:
+            self.events.append({"name": self._step, "cat": "step", "ph": "E", "ts": ts, "pid": self.pid, "tid": tid})
+            self._step = None
+        if name != "done":
+            self.events.append({"name": name, "cat": "step", "ph": "B", "ts": ts, "pid": self.pid, "tid": tid})
+            self._step = name
+
+    def save(self, filepath):
+        if self._step is not None:
+            self.step("done")
+        _save_trace(filepath, self.events)
+
+
+class SamplingProfiler:
+    """
+    取樣式 profiler：背景執行緒定期擷取目標執行緒的呼叫堆疊，
+    把連續相同的堆疊框合併成 trace 事件，在 trace viewer 中呈現為火焰圖。
+    """
+
+    def __init__(self, tracer: Tracer, interval: float = PROFILE_INTERVAL):
+        self.tracer = tracer
+        self.interval = interval
+        self.target_tid = threading.get_ident()
+        self.events = []
+        self._open = []  # [(frame 名稱, 開始時間)]，由根到葉
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self._close(0, self.tracer.now())
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.target_tid)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stack.reverse()
+            self._sample(stack, self.tracer.now())
+
+    def _sample(self, stack: list, ts: float):
+        common = 0
+        while common < len(self._open) and common < len(stack) and self._open[common][0] == stack[common]:
+            common += 1
+        self._close(common, ts)
+        self._open.extend((name, ts) for name in stack[common:])
+
+    def _close(self, depth: int, ts: float):
+        while len(self._open) > depth:
+            name, start = self._open.pop()
+            self.events.append({
+                "name": name,
+                "cat": "sample",
+                "ph": "X",
+                "ts": start,
+                "dur": ts - start,
+                "pid": self.tracer.pid,
+                "tid": self.target_tid,
+            })
+
+    def save(self, filepath):
+        _save_trace(filepath, self.events)
+
+
+def _save_trace(filepath, events: list):
+    with open(filepath, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+def span(name: str, cat: str = "pipeline", **args):
+    """在目前作用中的 Tracer 上記錄 span；未啟用追蹤時不做任何事。"""
+    tracer = _current_tracer.get()
+    if tracer is None:
+        return nullcontext()
+    return tracer.span(name, cat=cat, **args)
+
+
+def step(name: str):
+    tracer = _current_tracer.get()
+    if tracer is not None:
+        tracer.step(name)
+
+
+@contextmanager
+def job_trace(output_dir: str, profile: bool = False):
+    """
+    為一個 job 啟用追蹤，結束時（包含失敗時）把 trace.json（及 profile.json）寫入 output_dir。
+    產生的 dict 在離開時會填入輸出檔路徑。
+    """
+    tracer = Tracer()
+    profiler = SamplingProfiler(tracer) if profile else None
+    artifacts = {}
+    token = _current_tracer.set(tracer)
+    if profiler:
+        profiler.start()
+    try:
+        yield artifacts
+    finally:
+        _current_tracer.reset(token)
+        if profiler:
+            profiler.stop()
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        trace_path = Path(output_dir) / TRACE_FILENAME
+        tracer.save(trace_path)
+        artifacts["trace"] = str(trace_path)
+        print(f"✅ Trace saved to: {trace_path}")
+        if profiler:
+            profile_path = Path(output_dir) / PROFILE_FILENAME
+            profiler.save(profile_path)
+            artifacts["profile"] = str(profile_path)
+            print(f"✅ Sampled profile saved to: {profile_path}")
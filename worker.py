@@ -0,0 +1,154 @@
+# worker.py
+"""
+Pre-warmed local worker daemon for the PDF comparison pipeline.
+
+The daemon imports the pipeline and its heavy dependencies (PyMuPDF, pandas,
+imagehash, Pillow, numpy) once, then forks a child per job, so each job starts
+with everything already loaded. The CLI hands jobs over a Unix socket.
+
+Usage:
+    python worker.py [--socket PATH]
+    PDF_COMPARE_WORKER_SOCKET=PATH python main.py a.pdf b.pdf output
+Defaults:
+    socket = $PDF_COMPARE_WORKER_SOCKET or /tmp/pdf-compare-worker.sock
+
+Protocol (JSON lines): the client sends one job object
+    {"cwd": ..., "pdf_a": ..., "pdf_b": ..., "output_dir": ..., "options": {...}}
+and the worker replies with {"stdout": ...} messages for pipeline output,
+followed by a single {"result": {...}} or {"error": ..., "traceback": ...}.
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import traceback
+
+DEFAULT_SOCKET = os.getenv("PDF_COMPARE_WORKER_SOCKET", "/tmp/pdf-compare-worker.sock")
+
+
+class WorkerError(RuntimeError):
+    """Raised on the client side when the worker reports a failed job."""
+
+
+class _SocketWriter:
+    """File-like stdout replacement that forwards writes as {"stdout": ...} messages."""
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+
+    def write(self, text):
+        if text:
+            _send(self.wfile, {"stdout": text})
+        return len(text)
+
+    def flush(self):
+        self.wfile.flush()
+
+
+def _send(wfile, message):
+    wfile.write((json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8"))
+    wfile.flush()
+
+
+def warm_up():
+    """Import the pipeline and every heavy dependency it loads lazily."""
+    import fitz  # noqa: F401
+    import imagehash  # noqa: F401
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+    from PIL import Image  # noqa: F401
+
+    import pipeline  # noqa: F401
+
+
+class JobHandler(socketserver.StreamRequestHandler):
+    """Runs one job in the forked child and streams its output back."""
+
+    def handle(self):
+        from pipeline import run_pipeline
+
+        try:
+            job = json.loads(self.rfile.readline())
+        except ValueError as e:
+            _send(self.wfile, {"error": f"Invalid job request: {e}"})
+            return
+
+        sys.stdout = _SocketWriter(self.wfile)
+        try:
+            os.chdir(job["cwd"])
+            outputs = run_pipeline(job["pdf_a"], job["pdf_b"], job["output_dir"], **job.get("options", {}))
+            _send(self.wfile, {"result": outputs})
+        except Exception as e:
+            _send(self.wfile, {"error": f"{e}", "traceback": traceback.format_exc()})
+        finally:
+            sys.stdout = sys.__stdout__
+
+
+class WorkerServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    pass
+
+
+def serve(socket_path: str = DEFAULT_SOCKET):
+    warm_up()
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    old_umask = os.umask(0o077)  # socket is only reachable by the current user
+    try:
+        server = WorkerServer(socket_path, JobHandler)
+    finally:
+        os.umask(old_umask)
+
+    # Exit through the finally block below on `kill` as well as Ctrl+C
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    print(f"✅ Worker ready on {socket_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def submit(socket_path: str, pdf_path_a: str, pdf_path_b: str, output_dir: str, out=None, **options):
+    """
+    Hand a job to the worker at socket_path and return run_pipeline's outputs.
+    Pipeline output is echoed to `out` (default: sys.stdout). Raises FileNotFoundError /
+    ConnectionRefusedError if no worker is listening and WorkerError if the job failed.
+    """
+    out = out or sys.stdout
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        with sock.makefile("rwb") as f:
+            _send(f, {
+                "cwd": os.getcwd(),
+                "pdf_a": pdf_path_a,
+                "pdf_b": pdf_path_b,
+                "output_dir": output_dir,
+                "options": options,
+            })
+            for line in f:
+                message = json.loads(line)
+                if "stdout" in message:
+                    out.write(message["stdout"])
+                elif "result" in message:
+                    return message["result"]
+                elif "error" in message:
+                    raise WorkerError(message["error"] + "\n" + message.get("traceback", ""))
+    raise WorkerError("Worker closed the connection without a result")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a pre-warmed PDF comparison worker.")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="Unix socket path to listen on")
+    args = parser.parse_args()
+    serve(args.socket)
+
+
+if __name__ == "__main__":
+    main()